@@ -1,5 +1,7 @@
 import sys
+import time
 
+from itertools import chain
 from pprint import pformat
 
 from layabout import Layabout, MissingToken
@@ -7,20 +9,31 @@ from layabout import Layabout, MissingToken
 app = Layabout()
 
 
+# Cache channel IDs for a while so we don't hit Slack's rate limits by listing
+# every channel each time we need one.
+CHANNEL_ID_TTL = 600
+channel_ids = {}
+
+
 def channel_to_id(slack, channel):
     """ Surely there's a better way to do this... """
+    cached = channel_ids.get(channel)
+    if cached and cached[0] > time.monotonic():
+        return cached[1]
+
     channels = slack.api_call('channels.list').get('channels') or []
     groups = slack.api_call('groups.list').get('groups') or []
 
-    if not channels and not groups:
-        raise RuntimeError("Couldn't get channels and groups.")
-
-    ids = [c['id'] for c in channels + groups if c['name'] == channel]
+    channel_id = next(
+        (c['id'] for c in chain(channels, groups) if c['name'] == channel),
+        None
+    )
 
-    if not ids:
+    if channel_id is None:
         raise ValueError(f"Couldn't find #{channel}")
 
-    return ids[0]
+    channel_ids[channel] = (time.monotonic() + CHANNEL_ID_TTL, channel_id)
+    return channel_id
 
 
 def main():
@@ -1,40 +1,84 @@
 import os
 import time
+import asyncio
+import ssl
+import select
 import random
 import logging
+import threading
+import weakref
 import warnings
 from typing import (
     Any,
+    Awaitable,
     Callable,
     DefaultDict,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
     List,
+    Mapping,
     NoReturn,
     Optional,
+    Set,
     Tuple,
     Union,
 )
-from inspect import signature, Signature
-from functools import singledispatch
-from collections import defaultdict
+from inspect import (
+    CO_VARARGS,
+    CO_VARKEYWORDS,
+    iscoroutinefunction,
+    signature,
+)
+from types import FunctionType, MappingProxyType, MethodType
+from functools import partial
+from collections import defaultdict, deque
 
 from slackclient import SlackClient
 
-warnings.warn(
-    (
-        "Layabout is deprecated. See "
-        "https://layabout.readthedocs.io/en/latest/deprecation.html "
-        "for more information."
-    ),
-    category=DeprecationWarning,
-    stacklevel=2,
-)
-
 __author__ = 'Reilly Tucker Siemens'
 __email__ = 'reilly@tuckersiemens.com'
 __version__ = '1.0.2'
 
-# Private type alias for the complex type of the handlers defaultdict.
-_Handlers = DefaultDict[str, List[Tuple[Callable, dict]]]
+_DEPRECATION_MESSAGE = (
+    "Layabout is deprecated. See "
+    "https://layabout.readthedocs.io/en/latest/deprecation.html "
+    "for more information."
+)
+
+# The longest that an adaptive interval may grow to, in seconds, unless the
+# requested interval is already longer.
+_MAX_INTERVAL = 5.0
+
+# The most reads made to drain a burst of events before handling them, so a
+# busy workspace can't keep the event loop reading forever.
+_MAX_DRAIN_READS = 10
+
+# Truncated exponential backoff intervals in milliseconds, indexed by retry.
+# Anything past 2 ** 16 milliseconds is truncated to 64 seconds anyway.
+_BACKOFF_BASES = tuple(min(2 ** retry, 64000) for retry in range(17))
+
+# Private type alias for the complex type of the handlers dict. Each handler is
+# stored with its kwargs, whether it handles batches of events and whether it
+# is a coroutine function.
+_Handler = Tuple[Callable, Mapping, bool, bool]
+_Handlers = Dict[str, List[_Handler]]
+
+# Private type alias for the per-event handlers of an event type, as cached.
+_Dispatch = Tuple[Tuple[Callable, Mapping, bool], ...]
+
+# A shared, empty stand-in for the handlers of unhandled event types.
+_EMPTY: Tuple[_Handler, ...] = ()
+
+# A shared, read-only stand-in for the kwargs of handlers registered without.
+_NO_KWARGS: Mapping = MappingProxyType({})
+
+# Plain function event handlers that have already passed validation, so
+# registering the same handler for several event types only validates it once.
+# Other callables may not be hashable or weakly referenceable, and bound
+# methods are new objects every time they're looked up, so they aren't kept.
+_validated_handlers: 'weakref.WeakSet[Callable]' = weakref.WeakSet()
 
 log = logging.getLogger(__name__)
 
@@ -75,16 +119,30 @@ class _SlackClientWrapper:
         self.retries = retries
         self.backoff = backoff
 
+        # How long the most recent reads from the Slack API took.
+        self.read_times: Deque[float] = deque(maxlen=3)
+
         # Slack Connection is Initialization (SCII)
         self.connect_with_retry()
 
-    def connect(self) -> None:
-        """ Connect to the Slack API. """
-        self.inner.rtm_connect()
+    def connect(self) -> bool:
+        """ Connect to the Slack API. Return whether we're connected. """
+        return self.inner.rtm_connect()
+
+    @property
+    def sock(self) -> Any:
+        """ The socket underneath the Slack API websocket, if any. """
+        try:
+            return self.inner.server.websocket.sock
+        except AttributeError:
+            return None
 
     def is_connected(self) -> bool:
         """ Validate whether we're connected to the Slack API. """
-        return getattr(self.inner.server.websocket, 'connected', False)
+        try:
+            return self.inner.server.websocket.connected
+        except AttributeError:
+            return False
 
     def connect_with_retry(self) -> None:
         """ Attempt to connect to the Slack API. Retry on failures. """
@@ -92,22 +150,26 @@ class _SlackClientWrapper:
             log.debug('Already connected to the Slack API')
             return
 
+        connect, backoff, sleep = self.connect, self.backoff, time.sleep
         for retry in range(1, self.retries + 1):
-            self.connect()
-            if self.is_connected():
+            if connect():
                 log.debug('Connected to the Slack API')
                 return
             else:
-                interval = self.backoff(retry)
-                log.debug("Waiting %.3fs before retrying", interval)
-                time.sleep(interval)
+                interval = backoff(retry)
+                if log.isEnabledFor(logging.DEBUG):
+                    log.debug("Waiting %.3fs before retrying", interval)
+                sleep(interval)
 
         raise FailedConnection('Failed to connect to the Slack API')
 
     def fetch_events(self) -> List[dict]:
         """ Fetch new RTM events from the API. """
         try:
-            return self.inner.rtm_read()
+            start = time.perf_counter()
+            events = self.inner.rtm_read()
+            self.read_times.append(time.perf_counter() - start)
+            return events
 
         # TODO: The TimeoutError could be more elegantly resolved by making
         # a PR to the websocket-client library and letting them coerce that
@@ -119,6 +181,49 @@ class _SlackClientWrapper:
             self.connect_with_retry()
             return []
 
+    def iter_events(self, stopped: Optional[Callable[[], bool]] = None
+                    ) -> Iterator[dict]:
+        """
+        Yield new RTM events as they're fetched, including any that arrive
+        while reading, for at most ``_MAX_DRAIN_READS`` reads. Stop reading
+        early once ``stopped``, if given, returns ``True``.
+        """
+        for reads in range(1, _MAX_DRAIN_READS + 1):
+            events = self.fetch_events()
+            yield from events
+            if (not events or reads == _MAX_DRAIN_READS
+                    or (stopped is not None and stopped())
+                    or not self.wait_for_events(0)):
+                return
+
+    def drain_events(self) -> List[dict]:
+        """
+        Fetch new RTM events, including any that arrive while reading, for at
+        most ``_MAX_DRAIN_READS`` reads.
+        """
+        return list(self.iter_events())
+
+    def wait_for_events(self, timeout: float) -> bool:
+        """
+        Block until the Slack API has sent us something or ``timeout`` seconds
+        have passed, whichever comes first. Return whether there is something
+        to read.
+        """
+        sock = self.sock
+
+        # Data already decrypted by SSL won't wake select(), so check first.
+        if isinstance(sock, ssl.SSLSocket) and sock.pending():
+            return True
+
+        try:
+            readable, _, _ = select.select([sock], [], [], timeout)
+            return bool(readable)
+
+        # Without a usable socket (e.g. mid-reconnect) fall back to sleeping.
+        except (TypeError, ValueError, OSError):
+            time.sleep(timeout)
+            return False
+
 
 class Layabout:
     """
@@ -146,12 +251,31 @@ class Layabout:
 
            app.run()
     """
+    __slots__ = ('_env_var', '_token', '_slack', '_handlers',
+                 '_dispatch_cache', '_batch_types', '_stop', '__weakref__')
+
+    # Whether the deprecation warning has been issued yet.
+    _warned = False
+
     def __init__(self) -> None:
+        if not Layabout._warned:
+            warnings.warn(
+                _DEPRECATION_MESSAGE,
+                category=DeprecationWarning,
+                stacklevel=2,
+            )
+            Layabout._warned = True
+
         self._env_var = EnvVar('LAYABOUT_TOKEN')
+        self._token: Optional[str] = None
         self._slack: Optional[_SlackClientWrapper] = None
-        self._handlers: _Handlers = defaultdict(list)
+        self._handlers: _Handlers = {}
+        self._dispatch_cache: Dict[str, _Dispatch] = {}
+        self._batch_types: Set[str] = set()
+        self._stop = threading.Event()
 
-    def handle(self, type: str, *, kwargs: dict = None) -> Callable:
+    def handle(self, type: str, *, kwargs: dict = None,
+               batch: bool = False) -> Callable:
         """
         Register an event handler with the :obj:`Layabout` instance.
 
@@ -163,6 +287,12 @@ class Layabout:
                 `Slack RTM API <https://api.slack.com/rtm>`_.
             kwargs: Optional arbitrary keyword arguments passed to the event
                 handler when the event is triggered.
+            batch: If ``True`` the event handler is called once per batch of
+                events fetched from the Slack API with a :obj:`list` of all
+                the events of the given type, rather than once per event.
+
+        Coroutine functions may be registered as event handlers, but they are
+        only supported by :meth:`Layabout.arun`.
 
         Returns:
             A decorator that validates and registers a Layabout event handler.
@@ -173,14 +303,23 @@ class Layabout:
         """
         def decorator(fn: Callable) -> Callable:
             # Validate that the wrapped callable is a suitable event handler.
-            sig = signature(fn)
-            num_params = len(sig.parameters)
-            if num_params < 2:
-                raise TypeError(_format_parameter_error_message(
-                    fn.__name__, sig, num_params))
-
-            # Register a tuple of the callable and its kwargs, if any.
-            self._handlers[type].append((fn, kwargs or {}))
+            is_function = isinstance(fn, FunctionType)
+            if not (is_function and fn in _validated_handlers):
+                num_params = _count_parameters(fn)
+                if num_params < 2:
+                    raise TypeError(_format_parameter_error_message(
+                        fn, num_params))
+
+                if is_function:
+                    _validated_handlers.add(fn)
+
+            # Register a tuple of the callable, its kwargs, if any, whether it
+            # handles batches of events and whether it's a coroutine function.
+            self._handlers.setdefault(type, []).append(
+                (fn, kwargs or _NO_KWARGS, batch, iscoroutinefunction(fn)))
+            self._dispatch_cache.clear()
+            if batch:
+                self._batch_types.add(type)
             return fn
 
         return decorator
@@ -189,12 +328,24 @@ class Layabout:
                       backoff: Callable[[int], float]) -> None:
         """ Ensure we have a SlackClient. """
         connector = self._env_var if connector is None else connector
+        token = _resolve_token(connector)
+
+        # Reuse the existing SlackClient, and its connection, if the token
+        # hasn't changed since we last ran.
+        if self._slack is not None and token and token == self._token:
+            self._slack.retries = retries
+            self._slack.backoff = backoff
+            self._slack.connect_with_retry()
+            return
+
         slack: SlackClient = _create_slack(connector)
         self._slack = _SlackClientWrapper(
             slack=slack,
             retries=retries,
             backoff=backoff
         )
+        # Only remember the token once we've connected with it.
+        self._token = token
 
     def run(self, *,
             connector: Union[EnvVar, Token, SlackClient, None] = None,
@@ -210,8 +361,9 @@ class Layabout:
                 retrieved, or an established :obj:`SlackClient` instance. If
                 absent an attempt will be made to use the ``LAYABOUT_TOKEN``
                 environment variable.
-            interval: The number of seconds to wait between fetching events
-                from the Slack API.
+            interval: The maximum number of seconds to wait for new events
+                from the Slack API before fetching again. This is stretched
+                automatically while the Slack API is slow to respond.
             retries: The number of retry attempts to make if a connection to
                 Slack is not established or is lost.
             backoff: The strategy used to determine how long to wait between
@@ -222,18 +374,25 @@ class Layabout:
             until: The condition used to evaluate whether this method
                 terminates. Must take as input a :obj:`list` of :obj:`dict`
                 representing Slack RTM API events and return a :obj:`bool`. If
-                absent this method will run forever.
+                absent this method will run until :meth:`Layabout.stop` is
+                called.
 
         Raises:
-            TypeError: If an unsupported connector is given.
+            TypeError: If an unsupported connector is given or a coroutine
+                function is registered as an event handler. Use
+                :meth:`Layabout.arun` for those instead.
             MissingToken: If no API token is available.
             FailedConnection: If connecting to the Slack API fails.
 
         .. _truncated exponential backoff:
             https://cloud.google.com/storage/docs/exponential-backoff
         """
+        if any(is_coroutine for handlers in self._handlers.values()
+               for _, _, _, is_coroutine in handlers):
+            raise TypeError('Coroutine event handlers require Layabout.arun')
+
         backoff = backoff or _truncated_exponential
-        until = until or _forever
+        self._compile_dispatch()
 
         self._ensure_slack(
             connector=connector,
@@ -242,32 +401,258 @@ class Layabout:
         )
         assert self._slack is not None
 
-        while True:
-            events = self._slack.fetch_events()
+        # Look these up once rather than on every pass through the loop. The
+        # wrapper, and the client inside it, survive reconnections.
+        iter_events = self._slack.iter_events
+        drain_events = self._slack.drain_events
+        wait_for_events = self._slack.wait_for_events
+        read_times = self._slack.read_times
+        dispatch = self._dispatch
+        stopped = self._stop.is_set
+
+        try:
+            while True:
+                if until is None:
+                    # Nothing needs to see every event up front, so handle
+                    # events as they're read instead of collecting them first.
+                    # Handlers may stop us, so don't read any more once they
+                    # have.
+                    dispatch(iter_events(stopped))
+                else:
+                    events = drain_events()
+
+                    if not until(events):
+                        log.debug('Exiting event loop')
+                        break
+
+                    # Most reads come back empty. Don't bother dispatching
+                    # those.
+                    if events:
+                        dispatch(events)
+
+                if stopped():
+                    log.debug('Exiting event loop')
+                    break
+
+                # Wait for more events rather than pestering the Slack API.
+                wait_for_events(_adaptive_interval(interval, read_times))
+
+        # Only forget about being stopped once we actually have, so a stop
+        # requested just before we started isn't lost.
+        finally:
+            self._stop.clear()
+
+    async def arun(self, *,
+                   connector: Union[EnvVar, Token, SlackClient, None] = None,
+                   interval: float = 0.5, retries: int = 16,
+                   backoff: Callable[[int], float] = None,
+                   until: Callable[[List[dict]], bool] = None) -> None:
+        """
+        Connect to the Slack API and run the event handler loop as a
+        coroutine.
+
+        This accepts the same arguments as :meth:`Layabout.run`. Blocking
+        calls to the Slack API are made in the event loop's default executor
+        and event handlers may be coroutine functions, which are only
+        supported by this method and not :meth:`Layabout.run`. They run
+        concurrently with fetching and waiting for the next events, and any
+        still running are awaited before this method returns.
 
-            if not until(events):
-                log.debug('Exiting event loop')
-                break
+        Raises:
+            TypeError: If an unsupported connector is given.
+            MissingToken: If no API token is available.
+            FailedConnection: If connecting to the Slack API fails.
+        """
+        loop = asyncio.get_event_loop()
+        backoff = backoff or _truncated_exponential
+        self._compile_dispatch()
+
+        await loop.run_in_executor(None, partial(
+            self._ensure_slack,
+            connector=connector,
+            retries=retries,
+            backoff=backoff
+        ))
+        assert self._slack is not None
 
-            # Handle events!
-            for event in events:
-                type_ = event.get('type', '')
-                for handler in self._handlers[type_] + self._handlers['*']:
-                    fn, kwargs = handler
-                    fn(self._slack.inner, event, **kwargs)
+        stopped = self._stop.is_set
+        pending: List[asyncio.Future] = []
+        try:
+            while True:
+                # Coroutine handlers keep running while we fetch.
+                events = await loop.run_in_executor(
+                    None, self._slack.drain_events)
+
+                # Surface errors from handlers that have finished.
+                finished = [task for task in pending if task.done()]
+                pending = [task for task in pending if not task.done()]
+                for task in finished:
+                    task.result()
+
+                if until is not None and not until(events):
+                    break
+
+                if events:
+                    pending.extend(asyncio.ensure_future(awaitable)
+                                   for awaitable in self._dispatch(events))
+
+                # Wait for more events rather than pestering the Slack API,
+                # unless a handler has already stopped us.
+                if not stopped():
+                    await loop.run_in_executor(
+                        None, self._slack.wait_for_events,
+                        _adaptive_interval(interval, self._slack.read_times))
+
+                # Events already read are handled before stopping, even if
+                # the stop was requested while fetching them, but coroutine
+                # handlers may also stop us while we wait.
+                if stopped():
+                    break
+
+            log.debug('Exiting event loop')
+        finally:
+            try:
+                await asyncio.gather(*pending)
+            finally:
+                self._stop.clear()
+
+    def stop(self) -> None:
+        """
+        Stop a running event loop once the events currently being handled
+        have been handled. This may be called from an event handler or from
+        another thread.
+        """
+        self._stop.set()
+
+    def _dispatch(self, events: Iterable[dict]) -> List[Awaitable]:
+        """
+        Call the registered event handlers for a batch of events. Return the
+        awaitables produced by coroutine event handlers, if any.
+        """
+        assert self._slack is not None
+        slack = self._slack.inner
+        dispatch_cache = self._dispatch_cache
+        handlers_for = self._handlers_for
+        handled_types = self._handlers
+        batch_types = self._batch_types
+        batches: DefaultDict[str, List[dict]] = defaultdict(list)
+        pending = []
+
+        # Handle events!
+        for event in events:
+            try:
+                type_ = event['type']
+
+            # Replies to messages we've sent don't have a type, but splat
+            # handlers should still see them.
+            except KeyError:
+                type_ = ''
+
+            # Only hold on to events that batch handlers need.
+            if type_ in batch_types:
+                batches[type_].append(event)
+            if '*' in batch_types:
+                batches['*'].append(event)
+
+            # Most events go unhandled, so skip them as early as possible.
+            # Handlers may register splat handlers at any time, so look for
+            # them afresh every time.
+            if type_ not in handled_types and '*' not in handled_types:
+                continue
+
+            # Only fall back to merging handlers on a cache miss.
+            handlers = dispatch_cache.get(type_)
+            if handlers is None:
+                handlers = handlers_for(type_)
+
+            for fn, kwargs, is_coroutine in handlers:
+                # Skip unpacking kwargs for the common case of having none.
+                if kwargs:
+                    result = fn(slack, event, **kwargs)
+                else:
+                    result = fn(slack, event)
+                if is_coroutine:
+                    pending.append(result)
+
+        # Handle batches of events!
+        for type_, batch_events in batches.items():
+            registered = self._handlers.get(type_, _EMPTY)
+            for fn, kwargs, batch, is_coroutine in registered:
+                if batch:
+                    if kwargs:
+                        result = fn(slack, batch_events, **kwargs)
+                    else:
+                        result = fn(slack, batch_events)
+                    if is_coroutine:
+                        pending.append(result)
+
+        return pending
+
+    def _compile_dispatch(self) -> None:
+        """ Merge the handlers for every registered event type up front. """
+        for type_ in self._handlers:
+            self._handlers_for(type_)
+
+    def _handlers_for(self, type_: str) -> _Dispatch:
+        """
+        Get the per-event handlers for an event type, including splat
+        handlers, as tuples of the callable, its kwargs and whether it's a
+        coroutine function.
+        """
+        # Avoid merging handler lists for every single event.
+        handlers = self._dispatch_cache.get(type_)
+        if handlers is None:
+            registered = (*self._handlers.get(type_, _EMPTY),
+                          *self._handlers.get('*', _EMPTY))
+            handlers = tuple(
+                (fn, kwargs, is_coroutine)
+                for fn, kwargs, batch, is_coroutine in registered
+                if not batch
+            )
+            self._dispatch_cache[type_] = handlers
+        return handlers
+
+
+def _count_parameters(fn: Callable) -> int:
+    """
+    Count the parameters of a callable.
 
-            # Maybe don't pester the Slack API too much.
-            time.sleep(interval)
+    Plain functions and methods are counted straight from their code object,
+    which is much cheaper than building a full :obj:`inspect.Signature`.
+    Anything else (partials, wrapped functions, functions with an explicit
+    ``__signature__``, ...) falls back to :func:`inspect.signature`.
 
+    Args:
+        fn: The callable.
 
-def _format_parameter_error_message(name: str, sig: Signature,
-                                    num_params: int) -> str:
+    Returns:
+        int: The number of parameters the callable accepts.
+    """
+    # Bound methods don't count the parameter their instance is bound to, as
+    # long as there is a positional parameter for it rather than just *args.
+    if type(fn) is MethodType:
+        func = fn.__func__
+        if (type(func) is FunctionType
+                and func.__code__.co_argcount >= 1):
+            return _count_parameters(func) - 1
+        return len(signature(fn).parameters)
+
+    if (type(fn) is not FunctionType or hasattr(fn, '__wrapped__')
+            or hasattr(fn, '__signature__')):
+        return len(signature(fn).parameters)
+
+    code = fn.__code__
+    return (code.co_argcount + code.co_kwonlyargcount
+            + bool(code.co_flags & CO_VARARGS)
+            + bool(code.co_flags & CO_VARKEYWORDS))
+
+
+def _format_parameter_error_message(fn: Callable, num_params: int) -> str:
     """
     Format an error message for missing positional arguments.
 
     Args:
-        name: The function name.
-        sig: The function's signature.
+        fn: The function.
         num_params: The number of function parameters.
 
     Returns:
@@ -282,23 +667,24 @@ def _format_parameter_error_message(name: str, sig: Signature,
         missing = 1
         arguments = "'event'"
 
-    return (f"{name}{sig} missing {missing} required positional "
-            f"argument{plural}: {arguments}")
+    return (f"{fn.__name__}{signature(fn)} missing {missing} required "
+            f"positional argument{plural}: {arguments}")
 
 
-@singledispatch
-def _create_slack(connector: Any) -> NoReturn:
-    """ Default connector. Raises an error with unsupported connectors. """
-    raise TypeError(f"Invalid connector: {type(connector)}")
+def _resolve_token(connector: Any) -> Optional[str]:
+    """ Resolve the Slack API token a connector refers to, if any. """
+    if isinstance(connector, EnvVar):
+        return os.getenv(connector)
+    if isinstance(connector, Token):
+        return connector
+    return None
 
 
-@_create_slack.register(str)
 def _create_slack_with_string(string: str) -> NoReturn:
     """ Direct users to prefer :obj:`Token` and :obj:`EnvVar` over strings. """
     raise TypeError("Use layabout.Token or layabout.EnvVar instead of str")
 
 
-@_create_slack.register(EnvVar)
 def _create_slack_with_env_var(env_var: EnvVar) -> SlackClient:
     """ Create a :obj:`SlackClient` with a token from an env var. """
     token = os.getenv(env_var)
@@ -307,25 +693,67 @@ def _create_slack_with_env_var(env_var: EnvVar) -> SlackClient:
     raise MissingToken(f"Could not acquire token from {env_var}")
 
 
-@_create_slack.register(Token)
 def _create_slack_with_token(token: Token) -> SlackClient:
     """ Create a :obj:`SlackClient` with a provided token. """
-    if token != Token(''):
+    if token:
         return SlackClient(token=token)
     raise MissingToken("The empty string is an invalid Slack API token")
 
 
-@_create_slack.register(SlackClient)
 def _create_slack_with_slack_client(slack: SlackClient) -> SlackClient:
     """ Use an existing :obj:`SlackClient`. """
     return slack
 
 
-def _forever(events: List[dict]) -> bool:  # pragma: no cover because duh.
-    """ Run Layabout in an infinite loop. """
-    return True
+# Supported connector types and how to create a SlackClient from each.
+_SLACK_CREATORS: Dict[type, Callable[[Any], SlackClient]] = {
+    str: _create_slack_with_string,
+    EnvVar: _create_slack_with_env_var,
+    Token: _create_slack_with_token,
+    SlackClient: _create_slack_with_slack_client,
+}
+
+
+def _create_slack(connector: Any) -> SlackClient:
+    """
+    Create a :obj:`SlackClient` from a connector. Subclasses of supported
+    connector types are treated like the closest type they inherit from.
+
+    Raises:
+        TypeError: If an unsupported connector is given.
+    """
+    for cls in connector.__class__.__mro__:
+        create = _SLACK_CREATORS.get(cls)
+        if create is not None:
+            return create(connector)
+    raise TypeError(f"Invalid connector: {type(connector)}")
+
+
+def _adaptive_interval(interval: float, read_times: Iterable[float]) -> float:
+    """
+    Scale the interval between reads by how long recent reads from the Slack
+    API took, so we back off when the Slack API is slow to respond.
+
+    Args:
+        interval: The requested number of seconds between reads.
+        read_times: The durations, in seconds, of the most recent reads.
+
+    Returns:
+        float: The number of seconds to wait before reading again.
+    """
+    read_times = list(read_times)
+    if not read_times:
+        return interval
+
+    average = sum(read_times) / len(read_times)
+    if average < 0.05:
+        return interval
+
+    multiplier = 4 if average < 0.15 else 10
+    return min(interval * multiplier, max(interval, _MAX_INTERVAL))
 
 
 def _truncated_exponential(retry: int) -> float:
     """ An exponential backoff strategy for reconnecting to the Slack API. """
-    return (min(((2 ** retry) + random.randrange(1000)), 64000) / 1000)
+    base = _BACKOFF_BASES[min(retry, len(_BACKOFF_BASES) - 1)]
+    return min(base + random.randrange(1000), 64000) / 1000
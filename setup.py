@@ -9,22 +9,24 @@ if sys.version_info < (3, 6):
 
 from pathlib import Path  # noqa: pathlib can't be imported in Python < 3.4.
 
+VERSION_PATTERN = re.compile(r"__version__ = '([^']+)'")
 
-def get_version(string):
-    """ Retrieve the ``__version__`` attribute for Layabout. """
-    flags = re.S
-    pattern = r".*__version__ = '(.*?)'"
-    match = re.match(pattern=pattern, string=string, flags=flags)
 
-    if match:
-        return match.group(1)
+def get_version(path):
+    """ Retrieve the ``__version__`` attribute for Layabout. """
+    # Stop reading as soon as we've found the version.
+    with path.open(encoding='utf-8') as lines:
+        for line in lines:
+            match = VERSION_PATTERN.match(line)
+            if match:
+                return match.group(1)
 
     raise RuntimeError('No version string could be matched')
 
 
-here = Path(__name__).cwd()
-readme = (here / 'README.rst').read_text()
-version = get_version((here / 'layabout.py').read_text())
+here = Path(__file__).resolve().parent
+readme = (here / 'README.rst').read_bytes().decode('utf-8')
+version = get_version(here / 'layabout.py')
 
 # Requirements.
 install_reqs = [
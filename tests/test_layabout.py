@@ -1,10 +1,22 @@
-import os
+import asyncio
+import logging
+import random
+import re
+import warnings
+import weakref
+import socket
+import ssl
+import time
+from functools import partial
+from inspect import signature
+from types import MappingProxyType
 from unittest.mock import MagicMock, call
 from typing import Iterable
 
 import pytest
 from slackclient import SlackClient
 
+import layabout as layabout_module
 from layabout import (
     EnvVar,
     FailedConnection,
@@ -12,11 +24,16 @@ from layabout import (
     MissingToken,
     Token,
     _SlackClientWrapper,
+    _adaptive_interval,
     _truncated_exponential,
 )
 
 TOKEN = Token("This ain't no Slack API token.")
 
+# A real client to specify Slack mocks by. Unlike the SlackClient class, it
+# has a server attribute. It never connects to anything.
+SLACK_CLIENT_SPEC = SlackClient(token=TOKEN)
+
 # ---- Auxiliary functions ----------------------------------------------------
 
 
@@ -33,7 +50,7 @@ def mock_slack(connections: Iterable = None,
         tuple: A 2-tuple containing a mock :obj:`slackclient.SlackClient`
             and an associated instance.
     """
-    slack = MagicMock(spec=SlackClient)
+    slack = MagicMock(spec_set=SLACK_CLIENT_SPEC)
     slack.server = MagicMock()
 
     if connections:
@@ -42,133 +59,259 @@ def mock_slack(connections: Iterable = None,
     if reads:
         slack.rtm_read = MagicMock(side_effect=reads)
 
-    return MagicMock(spec=SlackClient, return_value=slack), slack
+    return MagicMock(spec_set=SlackClient, return_value=slack), slack
 
 
 def mock_slack_wrapper(connections: Iterable = None):
-    slack_wrapper = MagicMock(spec=_SlackClientWrapper)
+    slack_wrapper = MagicMock(spec_set=_SlackClientWrapper)
 
     if connections:
         slack_wrapper.is_connected = MagicMock(side_effect=connections)
 
-    cls = MagicMock(spec=_SlackClientWrapper, return_value=slack_wrapper)
+    cls = MagicMock(spec_set=_SlackClientWrapper, return_value=slack_wrapper)
     return cls, slack_wrapper
 
+
+def _handle_event(slack, event, **kwargs):
+    pass
+
+
+_HANDLER_SIGNATURE = signature(_handle_event)
+
+
+def mock_handler() -> MagicMock:
+    """
+    Mock an event handler.
+
+    Returns:
+        MagicMock: A mock with the signature of :func:`_handle_event`, so that
+            layabout doesn't have to introspect the mock itself to validate it.
+    """
+    handler = MagicMock()
+    handler.__signature__ = _HANDLER_SIGNATURE
+    return handler
+
+
+def _no_parameters():
+    pass
+
+
+def _one_parameter(slack):
+    pass
+
 # ---- Fixtures ---------------------------------------------------------------
 
 
+@pytest.fixture(scope='function')
+def patched_slack(monkeypatch):
+    """
+    Provide a factory for a :obj:`Layabout` whose ``SlackClient`` is mocked.
+
+    The factory takes the same arguments as :func:`mock_slack`, except that
+    ``connections`` defaults to a single successful connection, and returns a
+    3-tuple of the :obj:`Layabout`, the mock ``SlackClient`` class and its
+    instance.
+    """
+    def make(connections: Iterable = (True,), reads: Iterable = None):
+        SlackClient, slack = mock_slack(connections=connections, reads=reads)
+        monkeypatch.setattr(layabout_module, 'SlackClient', SlackClient)
+        return Layabout(), SlackClient, slack
+
+    return make
+
+
+@pytest.fixture(scope='function', autouse=True)
+def no_sleep(monkeypatch):
+    """ Make any backoff or wait between fetches return immediately. """
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(random, 'randrange', lambda n: 0)
+
+
+@pytest.fixture(scope='function')
+def layabout():
+    return Layabout()
+
+
 @pytest.fixture(scope='function')
 def run_once():
-    return MagicMock(side_effect=(True, False))
+    return lambda events, _it=iter((True, False)): next(_it)
 
 
-@pytest.fixture(scope='module')
+@pytest.fixture(scope='session')
 def events():
-    return [dict(type='hello'), dict(type='goodbye')]
+    # Read-only, so no test can change the events out from under another.
+    return (MappingProxyType(dict(type='hello')),
+            MappingProxyType(dict(type='goodbye')))
 
 # ---- Handler registration tests ---------------------------------------------
 
 
-def test_layabout_can_register_handler():
+def test_layabout_warns_about_deprecation_once(monkeypatch):
     """
-    Test that layabout can register Slack API event handlers normally.
+    Test that layabout warns that it's deprecated when first used, but only
+    the first time.
     """
-    layabout = Layabout()
+    monkeypatch.setattr(Layabout, '_warned', False)
 
-    def handle_hello(slack, event):
-        pass
+    with pytest.warns(DeprecationWarning, match='Layabout is deprecated'):
+        Layabout()
 
-    layabout.handle(type='hello')(fn=handle_hello)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        Layabout()
 
-    assert len(layabout._handlers) == 1
+
+def test_layabout_can_be_weakly_referenced(layabout):
+    """ Test that layabout's slots still allow weak references to it. """
+    assert weakref.ref(layabout)() is layabout
 
 
-def test_layabout_can_register_handler_via_decorator():
+@pytest.mark.parametrize('use_decorator,kwargs', [
+    (False, None),
+    (True, None),
+    (False, dict(spam='🍳')),
+    (True, dict(spam='🍳')),
+])
+def test_layabout_can_register_handler(layabout, use_decorator, kwargs):
     """
-    Test that layabout can register Slack API event handlers via decorator.
+    Test that layabout can register Slack API event handlers, with or without
+    keyword arguments, both normally and via decorator.
     """
-    layabout = Layabout()
-
-    @layabout.handle('hello')
-    def handle_hello(slack, event):
-        pass
+    if use_decorator:
+        layabout.handle('hello', kwargs=kwargs)(_handle_event)
+    else:
+        layabout.handle(type='hello', kwargs=kwargs)(fn=_handle_event)
 
     assert len(layabout._handlers) == 1
 
 
-def test_layabout_can_register_handler_with_kwargs():
+def test_layabout_can_register_handler_with_variadic_parameters(layabout):
     """
-    Test that layabout can register Slack API event handlers with keyword
-    arguments normally.
+    Test that layabout counts variadic parameters when validating event
+    handlers, whether or not they are plain functions.
     """
-    layabout = Layabout()
-    kwargs = dict(spam='🍳')
-
-    def handle_hello(slack, event):
+    def handle_hello(slack, *args, **kwargs):
         pass
 
-    layabout.handle(type='hello', kwargs=kwargs)(fn=handle_hello)
+    layabout.handle(type='hello')(fn=handle_hello)
+    layabout.handle(type='hello')(fn=partial(handle_hello, None))
 
-    assert len(layabout._handlers) == 1
+    assert len(layabout._handlers['hello']) == 2
 
 
-def test_layabout_can_register_handler_with_kwargs_via_decorator():
+def test_layabout_validates_a_handler_by_its_declared_signature(layabout):
     """
-    Test that layabout can register Slack API event handlers with keyword
-    arguments via decorator.
+    Test that layabout validates an event handler that declares its own
+    signature by that signature rather than by its code.
     """
-    layabout = Layabout()
-    kwargs = dict(spam='🍳')
-
-    @layabout.handle('hello', kwargs=kwargs)
-    def handle_hello(slack, event, spam):
+    def wrapper(*args, **kwargs):
         pass
 
-    assert len(layabout._handlers) == 1
+    wrapper.__signature__ = signature(_one_parameter)
+
+    with pytest.raises(TypeError, match=r"^wrapper\(slack\) missing 1 "
+                                        r"required positional argument: "
+                                        r"'event'$"):
+        layabout.handle(type='hello')(fn=wrapper)
 
 
-def test_layabout_raises_type_error_with_invalid_handler():
+def test_layabout_can_register_method_handler(layabout):
     """
-    Test that layabout raises a TypeError if an event handler that doesn't meet
-    the minimum criteria to be called correctly is registered.
+    Test that layabout doesn't count ``self`` when validating event handlers
+    that are bound methods, unless ``self`` is only taken through ``*args``.
     """
-    layabout = Layabout()
+    class Bot:
+        def handle_hello(self, slack, event):
+            pass
 
-    def invalid_handler():
-        pass
+        def handle_anything(*args, **kwargs):
+            pass
+
+        def invalid_handler(self, slack):
+            pass
+
+        def invalid_variadic_handler(*args):
+            pass
+
+    bot = Bot()
+    layabout.handle(type='hello')(fn=bot.handle_hello)
+    layabout.handle(type='hello')(fn=bot.handle_anything)
 
-    with pytest.raises(TypeError) as exc:
-        layabout.handle(type='hello')(fn=invalid_handler)
+    with pytest.raises(TypeError, match=r"^invalid_handler\(slack\) missing "
+                                        r"1 required positional argument: "
+                                        r"'event'$"):
+        layabout.handle(type='hello')(fn=bot.invalid_handler)
 
-    expected = ("invalid_handler() missing 2 required positional arguments: "
-                "'slack' and 'event'")
-    assert str(exc.value) == expected
+    with pytest.raises(TypeError, match=r"^invalid_variadic_handler\(\*args\) "
+                                        r"missing 1 required positional "
+                                        r"argument: 'event'$"):
+        layabout.handle(type='hello')(fn=bot.invalid_variadic_handler)
 
+    assert len(layabout._handlers['hello']) == 2
 
-def test_layabout_raises_type_error_with_invalid_decorated_handler():
+
+def test_layabout_validates_a_handler_only_once(layabout, monkeypatch):
     """
-    Test that layabout raises a TypeError if an event handler that doesn't meet
-    the minimum criteria to be called correctly is registered via decorator.
+    Test that layabout only validates a function event handler the first time
+    it's registered, while still registering and validating other callables,
+    even unhashable ones, every time.
     """
-    layabout = Layabout()
+    count_parameters = MagicMock(return_value=2)
+
+    monkeypatch.setattr(layabout_module, '_count_parameters',
+                        count_parameters)
+
+    # Define the handler here, since other tests have validated any module
+    # level handlers already.
+    def handle_hello(slack, event):
+        pass
+
+    class Handler:
+        # Like a dataclass with eq=True, instances of this can't be hashed.
+        __hash__ = None
 
-    with pytest.raises(TypeError) as exc:
-        @layabout.handle('hello')
-        def invalid_handler(slack):
+        def __call__(self, slack, event):
             pass
 
-    expected = ("invalid_handler(slack) missing 1 required positional "
-                "argument: 'event'")
-    assert str(exc.value) == expected
+    handler = Handler()
+    layabout.handle(type='hello')(fn=handle_hello)
+    layabout.handle(type='goodbye')(fn=handle_hello)
+    layabout.handle(type='hello')(fn=handler)
+    layabout.handle(type='goodbye')(fn=handler)
+
+    assert count_parameters.call_count == 3
+    assert len(layabout._handlers['hello']) == 2
+
+
+@pytest.mark.parametrize('use_decorator,handler,expected', [
+    (False, _no_parameters,
+     "_no_parameters() missing 2 required positional arguments: 'slack' and "
+     "'event'"),
+    (True, _one_parameter,
+     "_one_parameter(slack) missing 1 required positional argument: "
+     "'event'"),
+])
+def test_layabout_raises_type_error_with_invalid_handler(layabout,
+                                                         use_decorator,
+                                                         handler, expected):
+    """
+    Test that layabout raises a TypeError if an event handler that doesn't meet
+    the minimum criteria to be called correctly is registered, both normally
+    and via decorator.
+    """
+    with pytest.raises(TypeError, match=f'^{re.escape(expected)}$'):
+        if use_decorator:
+            layabout.handle('hello')(handler)
+        else:
+            layabout.handle(type='hello')(fn=handler)
 
 
-def test_layabout_handlers_can_be_decorated_and_used_normally():
+def test_layabout_handlers_can_be_decorated_and_used_normally(layabout):
     """
     Test that layabout can decorate event handlers that can still be used as
     though they were undecorated. Most importantly, that they can still return
     and that their docstrings are intact.
     """
-    layabout = Layabout()
     cheese_shop = dict(shop='🧀')
 
     @layabout.handle('hello')
@@ -179,15 +322,22 @@ def test_layabout_handlers_can_be_decorated_and_used_normally():
     assert handle_hello(None, None) == cheese_shop
     assert handle_hello.__doc__ == ' This docstring must be preserved. '
 
+
+def test_layabout_handlers_are_not_wrapped(layabout):
+    """
+    Test that layabout registers and returns event handlers as is rather than
+    wrapping them in another layer of function calls.
+    """
+    assert layabout.handle('hello')(_handle_event) is _handle_event
+    assert layabout._handlers['hello'][0][0] is _handle_event
+
 # ---- Connection tests -------------------------------------------------------
 
 
-def test_layabout_raises_type_error_with_invalid_connector():
+def test_layabout_raises_type_error_with_invalid_connector(layabout):
     """
     Test that layabout cannot connect to Slack with a pineapple.
     """
-    layabout = Layabout()
-
     class Pineapple:
         pass
 
@@ -196,14 +346,12 @@ def test_layabout_raises_type_error_with_invalid_connector():
         layabout.run(connector=Pineapple)
 
 
-def test_layabout_can_connect_to_slack_with_token(monkeypatch):
+def test_layabout_can_connect_to_slack_with_token(patched_slack):
     """
     Test that layabout can connect to the Slack API when given a valid Slack
     API token.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,))
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    layabout, SlackClient, _ = patched_slack()
 
     layabout.run(connector=TOKEN, until=lambda e: False)
 
@@ -211,18 +359,16 @@ def test_layabout_can_connect_to_slack_with_token(monkeypatch):
     SlackClient.assert_called_with(token=TOKEN)
 
 
-def test_layabout_can_connect_to_slack_with_env_var(monkeypatch):
+def test_layabout_can_connect_to_slack_with_env_var(patched_slack,
+                                                    monkeypatch):
     """
     Test that layabout can discover and use a Slack API token from an
     environment variable when not given one directly.
     """
     env_var = EnvVar('_TEST_LAYABOUT_TOKEN')
-    environ = {env_var: TOKEN}
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,))
+    layabout, SlackClient, _ = patched_slack()
 
-    monkeypatch.setattr(os, 'environ', environ)
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    monkeypatch.setenv(env_var, TOKEN)
 
     # Purposefully don't provide a connector so we have to use an env var.
     layabout.run(connector=env_var, until=lambda e: False)
@@ -232,70 +378,70 @@ def test_layabout_can_connect_to_slack_with_env_var(monkeypatch):
     SlackClient.assert_called_with(token=TOKEN)
 
 
-def test_layabout_can_connect_to_slack_with_existing_slack_client():
+def test_layabout_can_connect_to_slack_with_existing_slack_client(layabout):
     """
     Test that layabout can use an existing SlackClient as a connector.
     """
-    layabout = Layabout()
     _, slack = mock_slack(connections=(True,))
 
     layabout.run(connector=slack, until=lambda e: False)
 
 
-def test_layabout_raises_type_error_with_string_connector():
-    layabout = Layabout()
-
-    with pytest.raises(TypeError) as exc:
+def test_layabout_raises_type_error_with_string_connector(layabout):
+    with pytest.raises(TypeError, match=r'^Use layabout\.Token or '
+                                        r'layabout\.EnvVar instead of str$'):
         layabout.run(connector='', until=lambda e: False)
 
-    assert str(exc.value) == ('Use layabout.Token or layabout.EnvVar '
-                              'instead of str')
 
-
-def test_layabout_raises_missing_token_without_token(monkeypatch):
+def test_layabout_raises_missing_token_without_token(layabout, monkeypatch):
     """
     Test that layabout raises a MissingToken if there is no Slack API token for
     it to use.
     """
-    environ = dict()
-    layabout = Layabout()
-
-    monkeypatch.setattr(os, 'environ', environ)
+    monkeypatch.delenv('LAYABOUT_TOKEN', raising=False)
 
-    with pytest.raises(MissingToken) as exc:
+    with pytest.raises(MissingToken, match=r'^Could not acquire token from '
+                                           r'LAYABOUT_TOKEN$'):
         # until will exit early here just to be safe.
         layabout.run(until=lambda e: False)
 
-    assert str(exc.value) == 'Could not acquire token from LAYABOUT_TOKEN'
-
 
-def test_layabout_raises_missing_token_with_empty_token():
+def test_layabout_raises_missing_token_with_empty_token(layabout):
     """
     Test that layabout raises a MissingToken if given an empty Slack API token.
     """
-    layabout = Layabout()
-
-    with pytest.raises(MissingToken) as exc:
+    with pytest.raises(MissingToken, match=r'^The empty string is an invalid '
+                                           r'Slack API token$'):
         # until will exit early here just to be safe.
         layabout.run(connector=Token(''), until=lambda e: False)
 
-    assert str(exc.value) == 'The empty string is an invalid Slack API token'
-
 
 def test_layabout_can_connect_to_slack():
-    wrapper = _SlackClientWrapper(
-        slack=MagicMock(),
-        retries=1,
-        backoff=lambda r: 0
-    )
+    slack = MagicMock()
+    slack.server.websocket.connected = False
     # Retry once after failure.
-    wrapper.is_connected = MagicMock(side_effect=(False, True))
+    slack.rtm_connect.side_effect = (False, True)
+
+    _SlackClientWrapper(slack=slack, retries=2, backoff=lambda r: 0)
+
+    assert slack.rtm_connect.call_count == 2
+    slack.rtm_connect.assert_called_with()
+
+
+def test_layabout_is_not_connected_without_a_websocket():
+    """
+    Test that layabout doesn't consider itself connected to the Slack API
+    before the Slack client has a websocket.
+    """
+    slack = MagicMock()
+    slack.server.websocket = None
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
 
-    wrapper.connect_with_retry()
-    wrapper.inner.rtm_connect.assert_called_with()
+    assert not wrapper.is_connected()
+    assert wrapper.sock is None
 
 
-def test_layabout_raises_failed_connection_on_failed_connection():
+def test_layabout_raises_failed_connection_on_failed_connection(caplog):
     """
     Test that layabout raises a FailedConnection if the connection to the Slack
     API fails.
@@ -305,267 +451,612 @@ def test_layabout_raises_failed_connection_on_failed_connection():
         retries=1,
         backoff=lambda r: 0
     )
-    # Retry once after failure.
-    wrapper.is_connected = MagicMock(side_effect=(False, False))
+    # Don't let the mock websocket claim to be connected already.
+    wrapper.inner.server.websocket.connected = False
+    wrapper.inner.rtm_connect.return_value = False
+    caplog.set_level(logging.DEBUG, logger='layabout')
 
-    with pytest.raises(FailedConnection) as exc:
+    with pytest.raises(FailedConnection,
+                       match=r'^Failed to connect to the Slack API$'):
         wrapper.connect_with_retry()
 
-    assert str(exc.value) == 'Failed to connect to the Slack API'
+    wrapper.inner.rtm_connect.assert_called_once_with()
+    assert 'Waiting 0.000s before retrying' in caplog.messages
+
+
+@pytest.mark.parametrize('connections,reads,retries,expected', [
+    # Fail the initial connection without retrying.
+    ((False,), None, 1, FailedConnection),
+    # Succeed at first, then time out reading and fail to reconnect.
+    ((True, False), (TimeoutError,), 1, FailedConnection),
+    # Fail the initial connection twice, succeed at last.
+    ((False, False, True), ([],), 3, None),
+    # Time out reading and reconnect.
+    ((True, True), (TimeoutError,), 1, None),
+])
+def test_layabout_can_reuse_an_existing_client_to_reconnect(connections,
+                                                            reads, retries,
+                                                            expected):
+    """
+    Test that layabout reuses its existing SlackClient instance to reconnect
+    to the Slack API, and that it either carries on reading or gives up once
+    it runs out of retries.
+    """
+    _, slack = mock_slack(connections=connections, reads=reads)
+    # Don't let the mock websocket claim to be connected already.
+    slack.server.websocket.connected = False
+
+    def connect_and_read():
+        wrapper = _SlackClientWrapper(
+            slack=slack,
+            retries=retries,
+            backoff=lambda r: 0
+        )
+        return wrapper.fetch_events()
+
+    if expected:
+        with pytest.raises(expected):
+            connect_and_read()
+    else:
+        assert connect_and_read() == []
+
+    # Every connection attempt went through the one client we were given.
+    assert slack.rtm_connect.call_count == len(connections)
 
 
-def test_layabout_can_reuse_an_existing_client_to_reconnect(monkeypatch):
+def test_layabout_can_reuse_an_existing_client_to_run_again(patched_slack):
     """
-    Test that layabout can reuse an existing SlackClient instance to reconnect
-    to the Slack API rather than needlessly instantiating a new one on each
-    reconnection attempt.
+    Test that layabout reuses its existing SlackClient instance when run again
+    with the same Slack API token rather than instantiating a new one.
     """
-    layabout = Layabout()
-    # Fail initial connection, fail reconnection, succeed at last.
-    connections = (False, False, True)
-    SlackClient, _ = mock_slack(connections=connections)
+    layabout, SlackClient, _ = patched_slack()
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
-
-    # Retry connecting twice to verify reconnection logic was evaluated.
-    # until will exit early just to be safe.
-    layabout.run(
-        connector=TOKEN,
-        retries=2,
-        backoff=lambda r: 0,
-        until=lambda e: False
-    )
+    layabout.run(connector=TOKEN, until=lambda e: False)
+    layabout.run(connector=TOKEN, until=lambda e: False)
 
-    # Make sure the SlackClient was only instantiated once so we know that we
-    # reused the existing instance.
     SlackClient.assert_called_once_with(token=TOKEN)
 
 
-def test_layabout_can_continue_after_successful_reconnection(monkeypatch):
+def test_layabout_does_not_reuse_a_client_after_a_failed_connection(
+    patched_slack
+):
     """
-    Test that layabout can continue to handle events after successfully
-    reconnecting to the Slack API.
+    Test that layabout doesn't reuse a SlackClient connected with one token
+    after failing to connect with another.
     """
-    layabout = Layabout()
-    # Succeed with the first connection and the subsequent reconnection.
-    connections = (True, True)
-    # Raise an exception on the first read and return empty events next.
-    reads = (TimeoutError, [])
-    SlackClient, _ = mock_slack(connections=connections, reads=reads)
+    token_a, token_b = Token('A'), Token('B')
+    # Connect with A, fail to connect with B, then connect with B.
+    layabout, SlackClient, slack = patched_slack(connections=(True, False,
+                                                              True))
+    # Don't let the mock websocket claim to be connected already.
+    slack.server.websocket.connected = False
+    run = partial(layabout.run, retries=1, until=lambda e: False)
+
+    run(connector=token_a)
+    with pytest.raises(FailedConnection):
+        run(connector=token_b)
+    run(connector=token_b)
+
+    assert SlackClient.call_args_list == [
+        call(token=token_a),
+        call(token=token_b),
+        call(token=token_b),
+    ]
+
+
+def test_layabout_waits_on_the_slack_socket(monkeypatch):
+    """
+    Test that layabout stops waiting for events as soon as the Slack API
+    socket has something to read rather than sleeping the whole interval.
+    """
+    slack = MagicMock()
+    reader, writer = socket.socketpair()
+    slack.server.websocket.sock = reader
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
+    sleep = MagicMock()
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    monkeypatch.setattr(time, 'sleep', sleep)
 
-    layabout.run(
-        connector=TOKEN,
-        retries=1,
-        backoff=lambda r: 0,
-        until=lambda e: False
-    )
+    with reader, writer:
+        writer.send(b'{"type": "hello"}')
+        # If this blocked for the full interval the test would hang.
+        wrapper.wait_for_events(timeout=60)
 
+    sleep.assert_not_called()
 
-def test_layabout_backoff_backs_off(monkeypatch):
-    """ This is _truly_ a useless test. Why have I done this? """
-    monkeypatch.setattr('random.randrange', lambda n: 0)
-    assert _truncated_exponential(0) == 0.001
 
+def test_layabout_does_not_wait_with_pending_ssl_data():
+    """
+    Test that layabout doesn't wait on the Slack API socket when SSL already
+    has data buffered for it.
+    """
+    slack = MagicMock()
+    slack.server.websocket.sock = MagicMock(spec=ssl.SSLSocket)
+    slack.server.websocket.sock.pending.return_value = 1
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
 
-def test_layabout_backoff_does_not_exceed_64_seconds():
-    """ It doesn't go to 65.0. """
-    assert _truncated_exponential(16) == 64.0
-    assert _truncated_exponential(17) == 64.0
+    assert wrapper.wait_for_events(timeout=60)
 
-# ---- Event loop tests -------------------------------------------------------
 
+def test_layabout_sleeps_without_a_slack_socket(monkeypatch):
+    """
+    Test that layabout falls back to sleeping between fetches when there is no
+    usable Slack API socket to wait on.
+    """
+    slack = MagicMock()
+    slack.server.websocket.sock = None
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
+    sleep = MagicMock()
+
+    monkeypatch.setattr(time, 'sleep', sleep)
+
+    wrapper.wait_for_events(timeout=0.5)
+
+    sleep.assert_called_once_with(0.5)
+
+
+def test_layabout_drains_events_from_the_slack_socket():
+    """
+    Test that layabout keeps fetching events while the Slack API socket has
+    more to read so bursts of events are handled as one batch.
+    """
+    hello, goodbye = dict(type='hello'), dict(type='goodbye')
+    slack = MagicMock()
+    slack.rtm_read = MagicMock(side_effect=([hello], [goodbye], []))
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
+    wrapper.wait_for_events = MagicMock(return_value=True)
+
+    assert wrapper.drain_events() == [hello, goodbye]
 
-def test_layabout_can_handle_an_event(events, run_once, monkeypatch):
+
+def test_layabout_stops_draining_a_busy_slack_socket(monkeypatch):
     """
-    Test that layabout can handle an event.
+    Test that layabout stops fetching after a fixed number of reads even if
+    the Slack API socket always has more to read, so the events read so far
+    can be handled.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    handle_hello = MagicMock()
+    monkeypatch.setattr(layabout_module, '_MAX_DRAIN_READS', 3)
+    hello = dict(type='hello')
+    slack = MagicMock()
+    slack.rtm_read = MagicMock(return_value=[hello])
+    wrapper = _SlackClientWrapper(slack=slack, retries=1, backoff=lambda r: 0)
+    wrapper.wait_for_events = MagicMock(return_value=True)
+
+    assert wrapper.drain_events() == [hello, hello, hello]
+    assert slack.rtm_read.call_count == 3
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
 
-    layabout.handle('hello')(handle_hello)
+def test_layabout_interval_adapts_to_slow_reads():
+    """
+    Test that layabout waits longer between reads when the Slack API is slow,
+    but never longer than it has to.
+    """
+    assert _adaptive_interval(0.5, []) == 0.5
+    assert _adaptive_interval(0.5, [0.01, 0.02, 0.03]) == 0.5
+    assert _adaptive_interval(0.5, [0.1, 0.1, 0.1]) == 2.0
+    assert _adaptive_interval(0.5, [1.0, 1.0, 1.0]) == 5.0
+    assert _adaptive_interval(30, [1.0, 1.0, 1.0]) == 30
+
+
+@pytest.mark.parametrize('retry,expected', [
+    (0, 0.001),
+    (1, 0.002),
+    # It doesn't go to 65.0.
+    (16, 64.0),
+    (17, 64.0),
+    (10 ** 6, 64.0),
+])
+def test_layabout_backoff_backs_off(retry, expected):
+    """
+    Test that layabout backs off exponentially, but never for more than 64
+    seconds. The random jitter is pinned to 0 by the no_sleep fixture.
+    """
+    assert _truncated_exponential(retry) == expected
+
+# ---- Event loop tests -------------------------------------------------------
+
+
+@pytest.mark.parametrize('handlers,expected', [
+    pytest.param([('hello', None)], [[0]], id='one-event'),
+    pytest.param([('hello', dict(caerbannog='🐰'))], [[0]], id='kwargs'),
+    pytest.param([('this will never happen', None)], [[]], id='no-event'),
+    pytest.param([('hello', None), ('hello', None)], [[0], [0]],
+                 id='one-event-multiple-times'),
+    pytest.param([('hello', None), ('goodbye', None)], [[0], [1]],
+                 id='multiple-events'),
+    pytest.param([('*', None)], [[0, 1]], id='splat'),
+    pytest.param([('hello', None), ('*', None)], [[0], [0, 1]],
+                 id='normal-and-splat'),
+])
+def test_layabout_can_handle_events(events, run_once, patched_slack,
+                                    handlers, expected):
+    """
+    Test that layabout calls each handler, with its kwargs, for exactly the
+    events that happen for it and no others.
+
+    Each handler is given as a ``(type, kwargs)`` pair, and is expected to be
+    called with the events at the corresponding indices in ``expected``.
+    """
+    layabout, _, slack = patched_slack(reads=(events, []))
+    mocks = [mock_handler() for _ in handlers]
+    expected_calls = [
+        [call(slack, events[i], **(kwargs or {})) for i in indices]
+        for (_, kwargs), indices in zip(handlers, expected)
+    ]
+
+    for (type_, kwargs), handler in zip(handlers, mocks):
+        layabout.handle(type_, kwargs=kwargs)(handler)
     layabout.run(
         connector=TOKEN,
         interval=0,
         retries=0,
-        backoff=lambda r: 0,
         until=run_once
     )
 
-    handle_hello.assert_called_once_with(slack, events[0])
+    assert [m.call_args_list for m in mocks] == expected_calls
 
 
-def test_layabout_can_handle_an_event_with_kwargs(events, run_once,
-                                                  monkeypatch):
+def test_layabout_does_not_register_unhandled_events(events, run_once,
+                                                     patched_slack):
     """
-    Test that layabout can call an event handler that requires kwargs.
+    Test that layabout doesn't accumulate handler entries for events it has no
+    handlers for.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    kwargs = dict(caerbannog='🐰')
-    handle_hello = MagicMock()
+    layabout, _, _ = patched_slack(reads=(events, []))
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
-
-    layabout.handle('hello', kwargs=kwargs)(handle_hello)
+    layabout.handle('hello')(mock_handler())
     layabout.run(
         connector=TOKEN,
         interval=0,
         retries=0,
-        backoff=lambda r: 0,
         until=run_once
     )
 
-    handle_hello.assert_called_once_with(slack, events[0], **kwargs)
+    assert list(layabout._handlers) == ['hello']
+    assert list(layabout._dispatch_cache) == ['hello']
 
 
-def test_layabout_can_only_handle_events_that_happen(events, run_once,
-                                                     monkeypatch):
+def test_layabout_can_handle_an_event_without_a_type(run_once,
+                                                     patched_slack):
     """
-    Test that layabout only handles events that actually happen.
+    Test that layabout passes events without a type, like replies to sent
+    messages, to splat handlers.
     """
-    layabout = Layabout()
-    SlackClient, _ = mock_slack(connections=(True,), reads=(events, []))
-    aint_happenin = MagicMock()
-
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    events = [dict(ok=True, reply_to=1)]
+    layabout, _, slack = patched_slack(reads=(events, []))
+    splat = mock_handler()
 
-    layabout.handle('this will never happen')(aint_happenin)
+    layabout.handle('*')(splat)
     layabout.run(
         connector=TOKEN,
         interval=0,
         retries=0,
-        backoff=lambda r: 0,
         until=run_once
     )
 
-    aint_happenin.assert_not_called()
+    splat.assert_called_once_with(slack, events[0])
 
 
-def test_layabout_can_handle_one_event_multiple_times(events, run_once,
-                                                      monkeypatch):
+def test_layabout_can_handle_events_with_splat_handlers_added_at_runtime(
+    events,
+    run_once,
+    patched_slack
+):
     """
-    Test that layabout calls all handlers for a given event.
+    Test that a splat handler registered by another handler is called for the
+    very next event, even one from the same read.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    handle_hello1, handle_hello2 = MagicMock(), MagicMock()
+    layabout, _, slack = patched_slack(reads=(events, []))
+    splat = mock_handler()
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    @layabout.handle('hello')
+    def register_splat(slack, event):
+        layabout.handle('*')(splat)
 
-    layabout.handle('hello')(handle_hello1)
-    layabout.handle('hello')(handle_hello2)
     layabout.run(
         connector=TOKEN,
         interval=0,
         retries=0,
-        backoff=lambda r: 0,
         until=run_once
     )
 
-    handle_hello1.assert_called_once_with(slack, events[0])
-    handle_hello2.assert_called_once_with(slack, events[0])
+    splat.assert_called_once_with(slack, events[1])
 
 
-def test_layabout_can_handle_multiple_events(events, run_once, monkeypatch):
+def test_layabout_can_handle_events_forever(events, patched_slack):
     """
-    Test that layabout calls all handlers for their respective events.
+    Test that layabout handles events as they're read when it runs forever.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    handle_hello, handle_goodbye = MagicMock(), MagicMock()
+    class Stop(Exception):
+        """ Break out of the otherwise infinite event loop. """
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    layabout, _, slack = patched_slack(reads=(events, Stop))
+    expected = [call(slack, e) for e in events]
+    splat = mock_handler()
 
-    layabout.handle('hello')(handle_hello)
-    layabout.handle('goodbye')(handle_goodbye)
+    layabout.handle('*')(splat)
+    with pytest.raises(Stop):
+        layabout.run(
+            connector=TOKEN,
+            interval=0,
+            retries=0
+        )
+
+    splat.assert_has_calls(expected)
+
+
+def test_layabout_can_handle_a_batch_of_events(events, run_once,
+                                               patched_slack):
+    """
+    Test that layabout calls batch handlers once with all of the events of
+    their type.
+    """
+    events = [*events, dict(type='hello')]
+    layabout, _, slack = patched_slack(reads=(events, []))
+    handle_hellos, splat = mock_handler(), mock_handler()
+
+    layabout.handle('hello', kwargs=dict(spam='🍳'), batch=True)(handle_hellos)
+    layabout.handle('*', batch=True)(splat)
     layabout.run(
         connector=TOKEN,
         interval=0,
         retries=0,
-        backoff=lambda r: 0,
         until=run_once
     )
 
-    handle_hello.assert_called_once_with(slack, events[0])
+    handle_hellos.assert_called_once_with(slack, [events[0], events[2]],
+                                          spam='🍳')
+    splat.assert_called_once_with(slack, events)
+
+
+def test_layabout_can_handle_events_asynchronously(events, run_once,
+                                                   patched_slack):
+    """
+    Test that layabout can run as a coroutine and await coroutine event
+    handlers alongside regular ones.
+    """
+    layabout, _, slack = patched_slack(reads=(events, []))
+    handled = []
+    handle_goodbye = mock_handler()
+
+    @layabout.handle('hello')
+    async def handle_hello(slack, event):
+        handled.append(event)
+
+    @layabout.handle('*', batch=True)
+    async def splat(slack, events):
+        handled.extend(events)
+
+    layabout.handle('goodbye')(handle_goodbye)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(layabout.arun(
+            connector=TOKEN,
+            interval=0,
+            retries=0,
+            until=run_once
+        ))
+    finally:
+        loop.close()
+
+    assert handled == [events[0], *events]
     handle_goodbye.assert_called_once_with(slack, events[1])
 
 
-def test_layabout_can_handle_an_event_with_a_splat_handler(events, run_once,
-                                                           monkeypatch):
+def test_layabout_cannot_run_coroutine_event_handlers(layabout):
     """
-    Test that layabout can handle any event with a splat handler.
+    Test that layabout refuses to run coroutine event handlers outside of
+    :meth:`Layabout.arun`, rather than never awaiting them.
     """
-    layabout = Layabout()
-    events = events[:1]
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    splat = MagicMock()
+    @layabout.handle('hello')
+    async def handle_hello(slack, event):
+        pass
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    with pytest.raises(TypeError, match=r'^Coroutine event handlers require '
+                                        r'Layabout\.arun$'):
+        layabout.run(connector=TOKEN, until=lambda e: False)
 
-    layabout.handle('*')(splat)
+
+def test_layabout_can_be_stopped_by_a_handler(events, patched_slack):
+    """
+    Test that an event handler can stop layabout's event loop.
+    """
+    layabout, _, slack = patched_slack(reads=(events,))
+    handle_goodbye = mock_handler()
+
+    @layabout.handle('hello')
+    def stop(slack, event):
+        layabout.stop()
+
+    layabout.handle('goodbye')(handle_goodbye)
     layabout.run(
         connector=TOKEN,
         interval=0,
-        retries=0,
-        backoff=lambda r: 0,
-        until=run_once
+        retries=0
     )
 
-    splat.assert_called_once_with(slack, events[0])
+    # Events that were already read are still handled.
+    handle_goodbye.assert_called_once_with(slack, events[1])
 
 
-def test_layabout_can_handle_all_events_with_a_splat_handler(events, run_once,
-                                                             monkeypatch):
+def test_layabout_can_be_stopped_by_a_handler_while_busy(events,
+                                                         patched_slack,
+                                                         monkeypatch):
     """
-    Test that layabout can handle all events with a splat handler.
+    Test that a handler can stop layabout's event loop, and that handlers
+    registered at runtime are called, even while the Slack API always has
+    more events to read.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    splat = MagicMock()
+    layabout, _, slack = patched_slack()
+    slack.rtm_read = MagicMock(return_value=events)
+    monkeypatch.setattr(layabout_module, '_MAX_DRAIN_READS', 2)
+    monkeypatch.setattr(_SlackClientWrapper, 'wait_for_events',
+                        lambda self, timeout: True)
+    registered, seen = [], []
+
+    def splat(slack, event):
+        seen.append(event)
+        if event['type'] == 'goodbye':
+            layabout.stop()
 
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    @layabout.handle('hello')
+    def register_splat(slack, event):
+        if not registered:
+            layabout.handle('*')(splat)
+            registered.append(splat)
 
-    layabout.handle('*')(splat)
     layabout.run(
         connector=TOKEN,
         interval=0,
-        retries=0,
-        backoff=lambda r: 0,
-        until=run_once
+        retries=0
     )
 
-    splat.assert_has_calls([call(slack, e) for e in events])
+    # The splat handler sees the goodbye from the very first read, and no more
+    # is read once it has stopped the loop.
+    assert seen == [events[1]]
+    assert slack.rtm_read.call_count == 1
+
+
+def test_layabout_can_be_stopped_asynchronously(events, patched_slack):
+    """
+    Test that an event handler can stop layabout's event loop when running as
+    a coroutine.
+    """
+    layabout, _, _ = patched_slack(reads=(events,))
+    stopped = []
+
+    @layabout.handle('hello')
+    async def stop(slack, event):
+        layabout.stop()
+        stopped.append(event)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(layabout.arun(
+            connector=TOKEN,
+            interval=0,
+            retries=0
+        ))
+    finally:
+        loop.close()
+
+    assert stopped == [events[0]]
 
 
-def test_layabout_can_handle_events_with_normal_and_splat_handlers(
+def test_layabout_does_not_lose_a_stop_requested_before_running(
     events,
-    run_once,
-    monkeypatch
+    patched_slack
 ):
     """
-    Test that layabout can handle an event with normal handlers as well as
-    a splat handler.
+    Test that a stop requested just before layabout's event loop starts still
+    stops it, and that it's forgotten once the loop has stopped.
     """
-    layabout = Layabout()
-    SlackClient, slack = mock_slack(connections=(True,), reads=(events, []))
-    handle_hello, splat = MagicMock(), MagicMock()
-
-    monkeypatch.setattr('layabout.SlackClient', SlackClient)
+    layabout, _, slack = patched_slack(reads=(events,))
+    splat = mock_handler()
 
-    layabout.handle('hello')(handle_hello)
     layabout.handle('*')(splat)
+    layabout.stop()
     layabout.run(
         connector=TOKEN,
         interval=0,
-        retries=0,
-        backoff=lambda r: 0,
-        until=run_once
+        retries=0
     )
 
-    handle_hello.assert_called_once_with(slack, events[0])
-    splat.assert_has_calls([call(slack, e) for e in events])
+    assert splat.call_count == len(events)
+    assert not layabout._stop.is_set()
+
+
+def test_layabout_does_not_lose_a_stop_requested_before_running_async(
+    events,
+    patched_slack
+):
+    """
+    Test that a stop requested just before layabout's event loop starts still
+    stops it after handling the events it read when running as a coroutine,
+    and that it's forgotten once the loop has stopped.
+    """
+    layabout, _, slack = patched_slack(reads=(events,))
+    splat = mock_handler()
+
+    layabout.handle('*')(splat)
+    layabout.stop()
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(layabout.arun(
+            connector=TOKEN,
+            interval=0,
+            retries=0
+        ))
+    finally:
+        loop.close()
+
+    assert splat.call_count == len(events)
+    assert not layabout._stop.is_set()
+
+
+def test_layabout_keeps_reading_while_coroutine_handlers_run(patched_slack):
+    """
+    Test that a slow coroutine event handler doesn't keep layabout from
+    fetching and handling more events when running as a coroutine.
+    """
+    hello, goodbye = dict(type='hello'), dict(type='goodbye')
+    layabout, _, _ = patched_slack(reads=([hello], [goodbye], []))
+    loop = asyncio.new_event_loop()
+    # Before Python 3.10 events are bound to the current event loop.
+    asyncio.set_event_loop(loop)
+    said_goodbye = asyncio.Event()
+    handled = []
+
+    @layabout.handle('hello')
+    async def handle_hello(slack, event):
+        # This only finishes once a later event has been handled.
+        await said_goodbye.wait()
+        handled.append(event)
+
+    @layabout.handle('goodbye')
+    def handle_goodbye(slack, event):
+        said_goodbye.set()
+        handled.append(event)
+
+    try:
+        loop.run_until_complete(asyncio.wait_for(layabout.arun(
+            connector=TOKEN,
+            interval=0,
+            retries=0,
+            until=bool
+        ), timeout=5))
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+
+    assert handled == [goodbye, hello]
+
+
+def test_layabout_raises_errors_from_coroutine_handlers(events,
+                                                        patched_slack):
+    """
+    Test that errors raised by coroutine event handlers aren't swallowed when
+    running as a coroutine.
+    """
+    class Oops(Exception):
+        """ Something went wrong in a handler. """
+
+    layabout, _, _ = patched_slack(reads=(events, [], []))
+
+    @layabout.handle('hello')
+    async def handle_hello(slack, event):
+        raise Oops
+
+    loop = asyncio.new_event_loop()
+    try:
+        with pytest.raises(Oops):
+            loop.run_until_complete(layabout.arun(
+                connector=TOKEN,
+                interval=0,
+                retries=0,
+                until=lambda e: True
+            ))
+    finally:
+        loop.close()